@@ -7,6 +7,7 @@ Each letter is 1-2 pages, slightly different, with:
 - Some with accelerated vesting
 - Different fictionary beneficiary
 """
+import multiprocessing
 import os
 import random
 from datetime import date, timedelta
@@ -14,7 +15,6 @@ from fpdf import FPDF
 from faker import Faker
 
 fake = Faker()
-random.seed(42)
 
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "mock_letters")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -53,8 +53,22 @@ CONFIDENTIALITY_PARAGRAPHS = [
     "The existence and terms of this Virtual Share Agreement shall be treated as confidential information of the Company. The Beneficiary shall not disclose any terms herein without prior written consent of the Company.",
 ]
 
+_NUM_WORDS = {
+    500: "five hundred", 1000: "one thousand", 1500: "one thousand five hundred",
+    2000: "two thousand", 2500: "two thousand five hundred", 3000: "three thousand",
+    5000: "five thousand", 7500: "seven thousand five hundred",
+    10000: "ten thousand", 15000: "fifteen thousand", 20000: "twenty thousand",
+}
+
+# Boilerplate paragraph text -> wrapped lines, filled lazily by _boilerplate_paragraph
+_WRAPPED_LINES = {}
+
 
 def generate_letter(index: int):
+    # Seed per letter so output is deterministic regardless of which worker runs it
+    random.seed(42 + index)
+    fake.seed_instance(42 + index)
+
     company = random.choice(COMPANY_NAMES)
     beneficiary = fake.name()
     address = fake.address().replace("\n", ", ")
@@ -75,6 +89,8 @@ def generate_letter(index: int):
     board_approval_date = allotment_date - timedelta(days=random.randint(1, 30))
     employee_id = f"EMP-{random.randint(1000, 9999)}"
 
+    # A fresh FPDF per letter is cheap: Helvetica is a built-in core font, so no font file
+    # is parsed. Deep-copying a pre-configured prototype costs more than building a new one.
     pdf = FPDF()
     pdf.set_auto_page_break(auto=True, margin=25)
     pdf.add_page()
@@ -185,7 +201,7 @@ def generate_letter(index: int):
     pdf.set_font("Helvetica", "B", 10)
     pdf.cell(0, 6, f"{next_section}. GOOD LEAVER / BAD LEAVER", ln=True)
     pdf.set_font("Helvetica", size=10)
-    pdf.multi_cell(0, 5, leaver_provision)
+    _boilerplate_paragraph(pdf, leaver_provision)
     pdf.ln(3)
     next_section += 1
 
@@ -194,7 +210,7 @@ def generate_letter(index: int):
         pdf.set_font("Helvetica", "B", 10)
         pdf.cell(0, 6, f"{next_section}. NON-COMPETE", ln=True)
         pdf.set_font("Helvetica", size=10)
-        pdf.multi_cell(0, 5, non_compete)
+        _boilerplate_paragraph(pdf, non_compete)
         pdf.ln(3)
         next_section += 1
 
@@ -202,7 +218,7 @@ def generate_letter(index: int):
     pdf.set_font("Helvetica", "B", 10)
     pdf.cell(0, 6, f"{next_section}. CONFIDENTIALITY", ln=True)
     pdf.set_font("Helvetica", size=10)
-    pdf.multi_cell(0, 5, confidentiality)
+    _boilerplate_paragraph(pdf, confidentiality)
     pdf.ln(3)
     next_section += 1
 
@@ -210,7 +226,7 @@ def generate_letter(index: int):
     pdf.set_font("Helvetica", "B", 10)
     pdf.cell(0, 6, f"{next_section}. GOVERNING LAW AND JURISDICTION", ln=True)
     pdf.set_font("Helvetica", size=10)
-    pdf.multi_cell(0, 5,
+    _boilerplate_paragraph(pdf,
         f"This Agreement shall be governed by and construed in accordance with {governing_law}. "
         f"Any disputes arising out of or in connection with this Agreement shall be submitted to the "
         f"exclusive jurisdiction of the competent courts at the registered seat of the Company."
@@ -222,7 +238,7 @@ def generate_letter(index: int):
     pdf.set_font("Helvetica", "B", 10)
     pdf.cell(0, 6, f"{next_section}. MISCELLANEOUS", ln=True)
     pdf.set_font("Helvetica", size=10)
-    pdf.multi_cell(0, 5,
+    _boilerplate_paragraph(pdf,
         "This Agreement constitutes the entire understanding between the Parties with respect to the subject matter "
         "hereof and supersedes all prior negotiations, representations, and agreements. Any amendments to this "
         "Agreement must be made in writing and signed by both Parties. If any provision of this Agreement is held "
@@ -249,24 +265,35 @@ def generate_letter(index: int):
     return filepath, beneficiary, num_shares, strike_price, allotment_date, has_accelerated_vesting
 
 
+def _boilerplate_paragraph(pdf: FPDF, text: str):
+    """
+    Write a 10pt paragraph whose text is shared verbatim across letters.
+    multi_cell's line wrapping dominates generation time, so each distinct text is
+    wrapped once per process and the cached lines are written with cell() (ragged-right).
+    """
+    lines = _WRAPPED_LINES.get(text)
+    if lines is None:
+        lines = pdf.multi_cell(0, 5, text, dry_run=True, output="LINES")
+        _WRAPPED_LINES[text] = lines
+    for line in lines:
+        pdf.cell(0, 5, line, ln=True)
+
+
 def _num_to_words(n: int) -> str:
     """Simple number to words for common share counts."""
-    words = {
-        500: "five hundred", 1000: "one thousand", 1500: "one thousand five hundred",
-        2000: "two thousand", 2500: "two thousand five hundred", 3000: "three thousand",
-        5000: "five thousand", 7500: "seven thousand five hundred",
-        10000: "ten thousand", 15000: "fifteen thousand", 20000: "twenty thousand",
-    }
-    return words.get(n, str(n))
+    return _NUM_WORDS.get(n, str(n))
 
 
 if __name__ == "__main__":
     print(f"Generating 50 allotment letters in {OUTPUT_DIR}...\n")
     summary = []
-    for i in range(50):
-        path, name, shares, price, adate, accel = generate_letter(i)
-        summary.append((name, shares, price, adate, accel))
-        print(f"  [{i+1:02d}/50] {os.path.basename(path)}")
+    # Letters are independent and CPU-bound, so render them across all cores
+    with multiprocessing.Pool() as pool:
+        for done, (path, name, shares, price, adate, accel) in enumerate(
+            pool.imap_unordered(generate_letter, range(50), chunksize=4), start=1
+        ):
+            summary.append((name, shares, price, adate, accel))
+            print(f"  [{done:02d}/50] {os.path.basename(path)}")
 
     print(f"\nDone! {len(summary)} PDFs created in {OUTPUT_DIR}/")
     print(f"\nSample breakdown:")
@@ -1,24 +1,32 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+import os
+
+# Size torch/OpenMP thread pools before docling pulls them in (matches num_threads below)
+os.environ.setdefault("OMP_NUM_THREADS", "4")
+
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from docling.document_converter import DocumentConverter
-from docling.datamodel.pipeline_options import PdfPipelineOptions
-from docling.datamodel.accelerator_options import AcceleratorDevice, AcceleratorOptions
-from docling.datamodel.base_models import InputFormat
-from docling.document_converter import PdfFormatOption
+from fastapi.responses import FileResponse, Response
+import asyncio
 import tempfile
-import os
 import shutil
 import platform
+import threading
 import uuid
+from pathlib import Path
 
 from ocr_storage import (
-    create_document_storage, save_page_image, save_page_ocr,
+    create_document_storage, save_page_image, save_document_ocr,
     get_page_image_path, get_page_ocr, get_page_count,
 )
 
 app = FastAPI()
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Page images only need to be legible in the viewer and to anchor bboxes; pixel count
+# (and render/encode/write cost) grows with dpi², so 100 moves ~2.25x fewer bytes than 150
+OCR_DPI_DEFAULT = 100
+
 # Configure CORS
 # In production, replace with specific origins
 origins = [
@@ -38,6 +46,14 @@ app.add_middleware(
 # Initialize converter with GPU acceleration if available
 # Use MPS (Metal Performance Shaders) on Apple Silicon Macs
 def create_converter():
+    # Docling pulls in torch/onnxruntime, which takes seconds — import only when a
+    # converter is actually needed so the page-image/OCR endpoints start fast
+    from docling.document_converter import DocumentConverter, PdfFormatOption
+    from docling.datamodel.pipeline_options import PdfPipelineOptions
+    from docling.datamodel.accelerator_options import AcceleratorDevice, AcceleratorOptions
+    from docling.datamodel.base_models import InputFormat
+    from docling.backend.pypdfium2_backend import PyPdfiumDocumentBackend
+
     if platform.system() == "Darwin":  # macOS
         print("Detected macOS - enabling MPS (Metal) GPU acceleration")
         accelerator_options = AcceleratorOptions(
@@ -55,16 +71,71 @@ def create_converter():
     pdf_pipeline_options = PdfPipelineOptions()
     pdf_pipeline_options.accelerator_options = accelerator_options
 
+    # pypdfium2 backend: ~1.7x faster and ~2.5x less memory than the default
+    # docling-parse backend, at some cost to table cell text quality
     return DocumentConverter(
         format_options={
-            InputFormat.PDF: PdfFormatOption(pipeline_options=pdf_pipeline_options)
+            InputFormat.PDF: PdfFormatOption(
+                pipeline_options=pdf_pipeline_options,
+                backend=PyPdfiumDocumentBackend,
+            )
         }
     )
 
-converter = create_converter()
+_converter = None
+_converter_lock = threading.Lock()
+
+
+def get_converter():
+    """Return the shared DocumentConverter, creating it on first use."""
+    global _converter
+    # Locked so a /convert racing the startup warmup doesn't build a second converter
+    with _converter_lock:
+        if _converter is None:
+            _converter = create_converter()
+        return _converter
+
+
+def _warm_converter():
+    # Docling lazy-loads its model weights on the first convert() call.
+    # Pay that cost up front so the first /convert request sees steady-state latency.
+    # A generated mock letter is used if present; otherwise a one-page PDF is built on the fly.
+    sample = next((Path(__file__).parent / "mock_letters").glob("allotment_001_*.pdf"), None)
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            if sample is None:
+                from ocr_processor import write_sample_pdf
+                sample = Path(tmp_dir) / "warmup.pdf"
+                write_sample_pdf(str(sample))
+            get_converter().convert(str(sample))
+        print(f"[Warmup] Docling models loaded using {sample.name}")
+    except Exception as e:
+        print(f"[Warmup] Non-fatal error: {e}")
+
+
+@app.on_event("startup")
+async def _warmup():
+    # Set DOCLING_WARMUP=0 for workers that only serve the page-image/OCR endpoints
+    if os.environ.get("DOCLING_WARMUP", "1") == "0":
+        return
+    # Warm up in the background so the server starts accepting requests immediately
+    app.state.warmup_task = asyncio.create_task(asyncio.to_thread(_warm_converter))
+
+
+def _convert_document(path: str):
+    return get_converter().convert(path)
+
+
+def _extract_pdf_pages(pdf_path: str, dpi: int) -> tuple:
+    from ocr_processor import process_pdf
+    return process_pdf(pdf_path, dpi=dpi)
+
 
 @app.post("/convert")
-async def convert_document(file: UploadFile = File(...)):
+async def convert_document(
+    file: UploadFile = File(...),
+    dpi: int = Query(OCR_DPI_DEFAULT, ge=50, le=300, description="Render resolution for OCR page images"),
+):
     try:
         # Create a temporary file to save the uploaded content
         # Docling needs a file path
@@ -72,29 +143,38 @@ async def convert_document(file: UploadFile = File(...)):
         if not suffix:
             suffix = ""
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            shutil.copyfileobj(file.file, tmp)
+        # Copy in 1 MiB chunks rather than shutil's 16 KiB default to cut read/write syscalls
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, buffering=UPLOAD_CHUNK_SIZE) as tmp:
+            shutil.copyfileobj(file.file, tmp, length=UPLOAD_CHUNK_SIZE)
             tmp_path = tmp.name
 
         try:
-            # Convert the document with Docling
-            result = converter.convert(tmp_path)
+            # Docling conversion and the PyMuPDF OCR pipeline read the same file independently,
+            # so run them side by side in worker threads
+            tasks = [asyncio.to_thread(_convert_document, tmp_path)]
+            if suffix.lower() == ".pdf":
+                tasks.append(asyncio.to_thread(_extract_pdf_pages, tmp_path, dpi))
+            # Wait for both (even on failure) so the temp file isn't removed mid-read
+            result, *ocr_outcome = await asyncio.gather(*tasks, return_exceptions=True)
+            if isinstance(result, BaseException):
+                raise result
             markdown_content = result.document.export_to_markdown()
 
-            # Run OCR pipeline for PDFs
+            # Store OCR output for PDFs
             doc_id = None
             has_ocr = False
 
-            if suffix.lower() == ".pdf":
+            if ocr_outcome:
                 try:
-                    from ocr_processor import process_pdf
+                    if isinstance(ocr_outcome[0], BaseException):
+                        raise ocr_outcome[0]
+                    images, ocr_results = ocr_outcome[0]
                     doc_id = str(uuid.uuid4())
                     create_document_storage(doc_id)
 
-                    images, ocr_results = process_pdf(tmp_path)
-                    for i, (img, ocr_data) in enumerate(zip(images, ocr_results)):
-                        save_page_image(doc_id, i + 1, img)
-                        save_page_ocr(doc_id, i + 1, ocr_data)
+                    for i, png in enumerate(images):
+                        save_page_image(doc_id, i + 1, png)
+                    save_document_ocr(doc_id, ocr_results)
 
                     has_ocr = True
                     print(f"[OCR] Processed {len(images)} pages for doc_id={doc_id}")
@@ -120,19 +200,31 @@ async def convert_document(file: UploadFile = File(...)):
 
 
 @app.get("/page-image/{doc_id}/{page_num}")
-async def get_page_image(doc_id: str, page_num: int):
+async def get_page_image(doc_id: str, page_num: int, request: Request):
     path = get_page_image_path(doc_id, page_num)
-    if not path:
+    try:
+        stat = os.stat(path) if path else None
+    except FileNotFoundError:
+        stat = None
+    if stat is None:
         raise HTTPException(status_code=404, detail="Page image not found")
-    return FileResponse(path, media_type="image/png")
+
+    # Page images never change once written, so inode + mtime identifies the content
+    etag = f'"{stat.st_ino:x}-{stat.st_mtime_ns:x}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    # Pass our stat so FileResponse doesn't stat the file again
+    return FileResponse(path, media_type="image/png", stat_result=stat, headers={"ETag": etag})
 
 
 @app.get("/page-ocr/{doc_id}/{page_num}")
 async def get_page_ocr_data(doc_id: str, page_num: int):
-    data = get_page_ocr(doc_id, page_num)
-    if data is None:
+    regions_json = get_page_ocr(doc_id, page_num)
+    if regions_json is None:
         raise HTTPException(status_code=404, detail="OCR data not found")
-    return {"page": page_num, "regions": data}
+    # Splice the stored JSON straight into the response — no parse/re-serialize
+    content = b'{"page":%d,"regions":%s}' % (page_num, regions_json)
+    return Response(content=content, media_type="application/json")
 
 
 @app.get("/page-count/{doc_id}")
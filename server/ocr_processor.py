@@ -2,80 +2,168 @@
 PDF text extraction with bounding boxes using PyMuPDF.
 No OCR needed — extracts from the PDF's embedded text layer.
 """
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 import fitz  # PyMuPDF
-from PIL import Image
-import io
 
+# Documents with more than this many pages are split across ceil(pages / PAGES_PER_WORKER)
+# worker processes (capped at the CPU count), so a 17-page document gets two ranges of 8 and 9;
+# anything shorter is rendered in-process since the IPC/dispatch overhead would dominate.
+PAGES_PER_WORKER = 16
 
-def pdf_to_page_images(pdf_path: str, dpi: int = 150) -> list:
-    """Convert PDF to list of PIL Images (one per page)."""
-    doc = fitz.open(pdf_path)
-    images = []
-    zoom = dpi / 72.0
-    matrix = fitz.Matrix(zoom, zoom)
-    for page in doc:
-        pix = page.get_pixmap(matrix=matrix)
-        img = Image.open(io.BytesIO(pix.tobytes("png")))
-        images.append(img)
-    doc.close()
-    return images
+# process_pdf is called from request threads; serializes all in-process PyMuPDF use
+FITZ_LOCK = threading.Lock()
+
+# Shared worker pool, created on first use and reused across requests
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawn rather than fork: process_pdf runs in a thread of a process that also
+            # has Docling/torch threads running, and forking that can deadlock
+            _pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
 
 
-def extract_text_regions(pdf_path: str, dpi: int = 150) -> list:
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool (e.g. a worker was OOM-killed) so the next call starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        # Another thread may already have replaced it
+        if _pool is pool:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def page_to_png(page, matrix) -> bytes:
+    """Render a single PDF page and PNG-encode it with MuPDF."""
+    return page.get_pixmap(matrix=matrix).tobytes("png")
+
+
+def extract_text_regions(page, zoom: float) -> list:
     """
-    Extract text with bounding boxes from each page.
-    Returns list (one per page) of lists of regions:
+    Extract text with bounding boxes from a single page.
+    Returns a list of regions:
       [{"bbox": [[x1,y1],[x2,y2],[x3,y3],[x4,y4]], "text": str, "confidence": 1.0}]
 
-    Bounding boxes are scaled to match the rendered image at the given DPI.
+    Bounding boxes are scaled by `zoom` to match the rendered page image.
     """
-    doc = fitz.open(pdf_path)
+    blocks = page.get_text("dict", flags=fitz.TEXT_PRESERVE_WHITESPACE)["blocks"]
+    # Flatten text spans, dropping image blocks and whitespace-only spans
+    spans = [
+        (span["bbox"], text)
+        for block in blocks
+        if block["type"] == 0
+        for line in block["lines"]
+        for span in line["spans"]
+        if (text := span["text"].strip())
+    ]
+    regions = []
+    for (x0, y0, x1, y1), text in spans:
+        # bbox is (x0, y0, x1, y1) in PDF points — scale to image pixels
+        x0, y0, x1, y1 = x0 * zoom, y0 * zoom, x1 * zoom, y1 * zoom
+        # Convert to 4-corner polygon format for consistency
+        regions.append({
+            "bbox": [[x0, y0], [x1, y0], [x1, y1], [x0, y1]],
+            "text": text,
+            "confidence": 1.0,
+        })
+    return regions
+
+
+def write_sample_pdf(path: str):
+    """Write a small one-page text PDF, e.g. for warming up the Docling converter."""
+    with FITZ_LOCK:
+        doc = fitz.open()
+        try:
+            page = doc.new_page()
+            page.insert_text((72, 72), "Warmup document", fontsize=14)
+            page.insert_text((72, 100), "This page is used to load the document conversion models.")
+            doc.save(path)
+        finally:
+            doc.close()
+
+
+def _process_pages(doc, pages, dpi: int) -> tuple:
+    """Render + extract text for the given page indices of an open document."""
     zoom = dpi / 72.0
-    all_pages = []
-
-    for page in doc:
-        blocks = page.get_text("dict", flags=fitz.TEXT_PRESERVE_WHITESPACE)["blocks"]
-        regions = []
-        for block in blocks:
-            if block["type"] != 0:  # skip image blocks
-                continue
-            for line in block["lines"]:
-                for span in line["spans"]:
-                    text = span["text"].strip()
-                    if not text:
-                        continue
-                    # bbox is (x0, y0, x1, y1) in PDF points — scale to image pixels
-                    x0, y0, x1, y1 = span["bbox"]
-                    x0 *= zoom
-                    y0 *= zoom
-                    x1 *= zoom
-                    y1 *= zoom
-                    # Convert to 4-corner polygon format for consistency
-                    bbox = [
-                        [x0, y0],
-                        [x1, y0],
-                        [x1, y1],
-                        [x0, y1],
-                    ]
-                    regions.append({
-                        "bbox": bbox,
-                        "text": text,
-                        "confidence": 1.0,
-                    })
-        all_pages.append(regions)
-
-    doc.close()
-    return all_pages
-
-
-def process_pdf(pdf_path: str, dpi: int = 150) -> tuple:
+    matrix = fitz.Matrix(zoom, zoom)
+    images = []
+    text_regions = []
+    for page_index in pages:
+        page = doc[page_index]
+        images.append(page_to_png(page, matrix))
+        text_regions.append(extract_text_regions(page, zoom))
+    return images, text_regions
+
+
+def _process_page_range(pdf_path: str, start: int, stop: int, dpi: int) -> tuple:
+    """Worker entry point: open the PDF in this process and handle pages [start, stop)."""
+    doc = fitz.open(pdf_path)
+    try:
+        return _process_pages(doc, range(start, stop), dpi)
+    finally:
+        doc.close()
+
+
+def _process_in_pool(pdf_path: str, page_count: int, workers: int, dpi: int) -> tuple:
+    """Split the document into `workers` contiguous page ranges and process them in the shared pool."""
+    bounds = [page_count * i // workers for i in range(workers + 1)]
+    for attempt in range(2):
+        pool = _get_pool()
+        try:
+            futures = [
+                pool.submit(_process_page_range, pdf_path, start, stop, dpi)
+                for start, stop in zip(bounds, bounds[1:])
+            ]
+            images, text_regions = [], []
+            for future in futures:
+                chunk_images, chunk_regions = future.result()
+                images.extend(chunk_images)
+                text_regions.extend(chunk_regions)
+            return images, text_regions
+        except BrokenProcessPool as e:
+            print(f"[PDF] Worker pool broke (attempt {attempt + 1}): {e}")
+            _discard_pool(pool)
+
+    # Fresh pool failed too (likely this document kills workers) — render in-process instead
+    print("[PDF] Falling back to in-process rendering")
+    with FITZ_LOCK:
+        return _process_page_range(pdf_path, 0, page_count, dpi)
+
+
+def process_pdf(pdf_path: str, dpi: int = 100) -> tuple:
     """
-    Full pipeline: PDF → page images + text regions with bboxes.
-    Returns (images: list[PIL.Image], text_regions: list[list[dict]])
+    Full pipeline: PDF → PNG page images + text regions with bboxes.
+    Each page is rendered and text-extracted in a single pass. Long documents are
+    split into contiguous page ranges handled by a shared pool of worker processes
+    (PyMuPDF is not thread-safe, so threads can't be used here).
+    Returns (images: list[bytes], text_regions: list[list[dict]])
     """
-    print(f"[PDF] Rendering pages at {dpi} DPI...")
-    images = pdf_to_page_images(pdf_path, dpi=dpi)
-    print(f"[PDF] Extracting text regions from {len(images)} pages...")
-    text_regions = extract_text_regions(pdf_path, dpi=dpi)
-    print(f"[PDF] Done — {sum(len(r) for r in text_regions)} text regions found")
+    print(f"[PDF] Rendering pages and extracting text regions at {dpi} DPI...")
+    with FITZ_LOCK:
+        doc = fitz.open(pdf_path)
+        try:
+            page_count = doc.page_count
+            workers = min(os.cpu_count() or 1, -(-page_count // PAGES_PER_WORKER))
+            if workers <= 1:
+                images, text_regions = _process_pages(doc, range(page_count), dpi)
+        finally:
+            doc.close()
+
+    if workers > 1:
+        images, text_regions = _process_in_pool(pdf_path, page_count, workers, dpi)
+
+    print(f"[PDF] Done — {len(images)} pages, {sum(len(r) for r in text_regions)} text regions found")
     return images, text_regions
@@ -1,16 +1,31 @@
 """
 Manages file-based storage for OCR data and page images.
 Storage layout: server/ocr_data/{doc_id}/pages/page_N.png
-                server/ocr_data/{doc_id}/ocr/page_N.json
+                server/ocr_data/{doc_id}/ocr.jsonl      (one line of regions per page)
+                server/ocr_data/{doc_id}/ocr.idx.json   (byte offsets of each line)
 """
+import hashlib
 import os
-import json
 import shutil
+from collections import OrderedDict
 from pathlib import Path
 from typing import Optional
 
+import orjson
+
 BASE_DIR = Path(__file__).parent / "ocr_data"
 
+# doc_id -> number of saved page images, so page lookups don't hit the filesystem
+_page_counts: dict = {}
+
+# doc_id -> parsed ocr.idx.json offsets, so page OCR reads open only the JSONL file
+_ocr_offsets: dict = {}
+
+# SHA-256 of PNG bytes -> path of a stored page with that content, for hardlink dedup.
+# Kept in least-recently-used order and capped at MAX_DEDUP_DIGESTS entries.
+MAX_DEDUP_DIGESTS = 10_000
+_image_paths_by_digest: OrderedDict = OrderedDict()
+
 
 def _doc_dir(doc_id: str) -> Path:
     return BASE_DIR / doc_id
@@ -19,48 +34,113 @@ def _doc_dir(doc_id: str) -> Path:
 def create_document_storage(doc_id: str) -> Path:
     doc_dir = _doc_dir(doc_id)
     (doc_dir / "pages").mkdir(parents=True, exist_ok=True)
-    (doc_dir / "ocr").mkdir(parents=True, exist_ok=True)
+    _page_counts[doc_id] = 0
     return doc_dir
 
 
-def save_page_image(doc_id: str, page_num: int, image) -> str:
-    """Save a PIL Image as PNG. Returns the file path."""
+def save_page_image(doc_id: str, page_num: int, png: bytes) -> str:
+    """
+    Save an already-encoded PNG page image. Returns the file path.
+    Pages identical to one already stored (e.g. the same document uploaded twice)
+    are hardlinked to the existing file instead of being written again.
+    """
     path = _doc_dir(doc_id) / "pages" / f"page_{page_num}.png"
-    image.save(str(path), "PNG")
+    digest = hashlib.sha256(png).digest()
+    existing = _image_paths_by_digest.get(digest)
+    if existing is not None:
+        try:
+            os.link(existing, path)
+            _image_paths_by_digest.move_to_end(digest)
+        except OSError:
+            # Original was cleaned up, or the filesystem can't hardlink
+            existing = None
+    if existing is None:
+        path.write_bytes(png)
+        _image_paths_by_digest[digest] = str(path)
+        _image_paths_by_digest.move_to_end(digest)
+        if len(_image_paths_by_digest) > MAX_DEDUP_DIGESTS:
+            _image_paths_by_digest.popitem(last=False)
+    _page_counts[doc_id] = max(_page_counts.get(doc_id, 0), page_num)
     return str(path)
 
 
-def save_page_ocr(doc_id: str, page_num: int, ocr_result: list) -> str:
-    """Save OCR result (list of regions) as JSON. Returns the file path."""
-    path = _doc_dir(doc_id) / "ocr" / f"page_{page_num}.json"
-    with open(path, "w") as f:
-        json.dump(ocr_result, f)
+def save_document_ocr(doc_id: str, ocr_results: list) -> str:
+    """
+    Save OCR results for all pages (list of region lists) as a single JSON Lines file,
+    plus an offset index so individual pages can be read without scanning the file.
+    Returns the JSONL file path.
+    """
+    doc_dir = _doc_dir(doc_id)
+    lines = [orjson.dumps(regions) + b"\n" for regions in ocr_results]
+    # offsets[i] is where page i+1 starts; the final entry is the end of the file
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+
+    path = doc_dir / "ocr.jsonl"
+    with open(path, "wb") as f:
+        f.write(b"".join(lines))
+    with open(doc_dir / "ocr.idx.json", "wb") as f:
+        f.write(orjson.dumps(offsets))
+    _ocr_offsets[doc_id] = offsets
     return str(path)
 
 
 def get_page_image_path(doc_id: str, page_num: int) -> Optional[str]:
-    path = _doc_dir(doc_id) / "pages" / f"page_{page_num}.png"
-    if path.exists():
-        return str(path)
-    return None
+    if not 1 <= page_num <= get_page_count(doc_id):
+        return None
+    return str(_doc_dir(doc_id) / "pages" / f"page_{page_num}.png")
+
+
+def get_page_ocr(doc_id: str, page_num: int) -> Optional[bytes]:
+    """Return the page's regions as serialized JSON (a JSON array), without parsing it."""
+    doc_dir = _doc_dir(doc_id)
+    offsets = _ocr_offsets.get(doc_id)
+    if offsets is None:
+        # Not seen by this process (e.g. saved before a restart) — load once, then cache
+        index_path = doc_dir / "ocr.idx.json"
+        if not index_path.exists():
+            return _get_legacy_page_ocr(doc_id, page_num)
+        with open(index_path, "rb") as f:
+            offsets = orjson.loads(f.read())
+        _ocr_offsets[doc_id] = offsets
+    if not 1 <= page_num < len(offsets):
+        return None
+    start, end = offsets[page_num - 1], offsets[page_num]
+    with open(doc_dir / "ocr.jsonl", "rb") as f:
+        f.seek(start)
+        return f.read(end - start).rstrip(b"\n")
 
 
-def get_page_ocr(doc_id: str, page_num: int) -> Optional[list]:
+def _get_legacy_page_ocr(doc_id: str, page_num: int) -> Optional[bytes]:
+    """Read OCR data stored in the older one-file-per-page layout (ocr/page_N.json)."""
     path = _doc_dir(doc_id) / "ocr" / f"page_{page_num}.json"
     if not path.exists():
         return None
-    with open(path, "r") as f:
-        return json.load(f)
+    return path.read_bytes()
 
 
 def get_page_count(doc_id: str) -> int:
+    count = _page_counts.get(doc_id)
+    if count is not None:
+        return count
+    # Not seen by this process (e.g. saved before a restart) — count once, then cache
     pages_dir = _doc_dir(doc_id) / "pages"
     if not pages_dir.exists():
         return 0
-    return len(list(pages_dir.glob("page_*.png")))
+    count = sum(1 for _ in pages_dir.glob("page_*.png"))
+    if count:
+        _page_counts[doc_id] = count
+    return count
 
 
 def cleanup_document(doc_id: str):
+    _page_counts.pop(doc_id, None)
+    _ocr_offsets.pop(doc_id, None)
     doc_dir = _doc_dir(doc_id)
+    pages_prefix = str(doc_dir / "pages") + os.sep
+    for digest, path in list(_image_paths_by_digest.items()):
+        if path.startswith(pages_prefix):
+            del _image_paths_by_digest[digest]
     if doc_dir.exists():
         shutil.rmtree(doc_dir)